@@ -1,133 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, desc, func, literal, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 from datetime import datetime, timedelta
+from typing import Optional
 import uuid
 
-from app.database import get_db, AsyncSessionLocal
+from app.database import get_db
 from app.config import settings
 from app.schemas import (
     TransferRequest,
     TransactionStatusResponse,
-    NodeStatus,
 )
 from app.models import DistributedTransaction, TransactionStatus
 from app.services.coordinator_service import coordinator_service
 from app.services.failure_detector import failure_detector
+from app.utils.ids import uuid7
 
 router = APIRouter()
 
+_TX_STATUS = TypeAdapter(TransactionStatusResponse)
 
-def _resolve_participants_for_transfer(request: TransferRequest) -> list[str]:
-    """
-    Resolve participant URLs explicitly using from_node and to_node.
-    No guessing. No schema inference.
-    """
+_LIST_TX_STMT_BASE = (
+    select(
+        DistributedTransaction.id,
+        DistributedTransaction.status,
+        DistributedTransaction.operation_type,
+        DistributedTransaction.created_at,
+        DistributedTransaction.timeout_at,
+        func.json_array_length(DistributedTransaction.participant_urls),
+    )
+    # id breaks ties between rows created in the same instant
+    .order_by(desc(DistributedTransaction.created_at), desc(DistributedTransaction.id))
+)
 
-    from_node = request.from_node
-    to_node = request.to_node
 
-    nodes = settings.nodes
+def _participant_url(node_id: str, field: str) -> str:
+    url = settings.get_participant_url(node_id)
+    if url:
+        return url
 
-    if from_node not in nodes:
+    if node_id not in settings.nodes:
         raise HTTPException(
             status_code=400,
-            detail=f"Unknown from_node: {from_node}",
+            detail=f"Unknown {field}: {node_id}",
         )
 
-    if to_node not in nodes:
+    if settings.nodes[node_id]["role"] != "participant":
         raise HTTPException(
             status_code=400,
-            detail=f"Unknown to_node: {to_node}",
+            detail=f"{node_id} is not a participant",
         )
 
-    if nodes[from_node]["role"] != "participant":
-        raise HTTPException(
-            status_code=400,
-            detail=f"{from_node} is not a participant",
-        )
+    raise HTTPException(
+        status_code=500,
+        detail=f"URL not found for node {node_id}",
+    )
 
-    if nodes[to_node]["role"] != "participant":
-        raise HTTPException(
-            status_code=400,
-            detail=f"{to_node} is not a participant",
-        )
 
-    participant_ids = []
-    if from_node == to_node:
-        participant_ids.append(from_node)
-    else:
-        participant_ids.extend([from_node, to_node])
+def _resolve_participants_for_transfer(request: TransferRequest) -> list[str]:
+    """
+    Resolve participant URLs explicitly using from_node and to_node.
+    No guessing. No schema inference.
+    """
+
+    from_url = _participant_url(request.from_node, "from_node")
+    to_url = _participant_url(request.to_node, "to_node")
 
-    participant_urls = []
-    for node_id in participant_ids:
-        url = settings.get_node_url(node_id)
-        if not url:
-            raise HTTPException(
-                status_code=500,
-                detail=f"URL not found for node {node_id}",
-            )
-        participant_urls.append(url)
+    if request.from_node == request.to_node:
+        return [from_url]
 
-    return participant_urls
+    return [from_url, to_url]
 
 
 @router.post(
     "/transaction/transfer",
     response_model=TransactionStatusResponse,
 )
-async def create_transfer(
-    request: TransferRequest,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db),
-):
+async def create_transfer(request: TransferRequest):
     if settings.node_role != "coordinator":
         raise HTTPException(
             status_code=403,
             detail="Only coordinator can initiate transactions",
         )
 
-    transaction_id = str(uuid.uuid4())
+    transaction_id = str(uuid7())
 
     participant_urls = _resolve_participants_for_transfer(request)
 
-    transaction = DistributedTransaction(
-        id=transaction_id,
-        status=TransactionStatus.INIT,
-        operation_type="transfer",
-        operation_data=request.dict(),
-        participant_urls=participant_urls,
-        participant_votes={},
-        participant_decisions={},
-        created_at=datetime.utcnow(),
-        timeout_at=datetime.utcnow()
-        + timedelta(milliseconds=settings.prepare_timeout),
-    )
-
-    db.add(transaction)
-    await db.commit()
-    await db.refresh(transaction)
-
-    background_tasks.add_task(
-        _run_2pc_task,
-        transaction_id,
-    )
+    now = datetime.utcnow()
+    transaction = {
+        "id": transaction_id,
+        "status": TransactionStatus.INIT,
+        "operation_type": "transfer",
+        "operation_data": request.model_dump(mode="json"),
+        "participant_urls": participant_urls,
+        "participant_votes": {},
+        "participant_decisions": {},
+        "created_at": now,
+        "timeout_at": now + timedelta(milliseconds=settings.prepare_timeout),
+    }
 
-    return TransactionStatusResponse(
-        transaction_id=transaction.id,
-        status=transaction.status,
-        votes=transaction.participant_votes,
-        decisions=transaction.participant_decisions,
-        created_at=transaction.created_at,
-        timeout_at=transaction.timeout_at,
-    )
+    # Returns once the row is committed together with the rest of its batch
+    await coordinator_service.submit(transaction)
 
-
-async def _run_2pc_task(transaction_id: str):
-    async with AsyncSessionLocal() as db:
-        await coordinator_service.execute_2pc(
-            db=db,
-            transaction_id=transaction_id,
-        )
+    return _TX_STATUS.validate_python(transaction)
 
 
 @router.get(
@@ -144,6 +121,14 @@ async def get_transaction_status(
             detail="Only coordinator can query transaction status",
         )
 
+    try:
+        uuid.UUID(transaction_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=404,
+            detail="Transaction not found",
+        )
+
     transaction = await db.get(DistributedTransaction, transaction_id)
     if not transaction:
         raise HTTPException(
@@ -151,51 +136,66 @@ async def get_transaction_status(
             detail="Transaction not found",
         )
 
-    return TransactionStatusResponse(
-        transaction_id=transaction.id,
-        status=transaction.status,
-        votes=transaction.participant_votes,
-        decisions=transaction.participant_decisions,
-        created_at=transaction.created_at,
-        timeout_at=transaction.timeout_at,
-    )
+    return _TX_STATUS.validate_python(transaction, from_attributes=True)
 
 
 @router.get("/transactions")
 async def list_transactions(
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[uuid.UUID] = None,
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Most recent transactions first. Pass the returned `next_cursor` as
+    `before` to fetch the next page; it is None on the last page.
+    """
     if settings.node_role != "coordinator":
         raise HTTPException(
             status_code=403,
             detail="Only coordinator can list transactions",
         )
 
-    from sqlalchemy import select, desc
+    stmt = _LIST_TX_STMT_BASE
+    if before is not None:
+        # Bound with the column type: a VARCHAR parameter cannot be
+        # compared with the uuid id column
+        cursor_id = literal(str(before), DistributedTransaction.id.type)
+        # Keyset on (created_at, id): created_at alone is not unique, and
+        # rows sharing the boundary timestamp would be skipped
+        cursor_created_at = (
+            select(DistributedTransaction.created_at)
+            .where(DistributedTransaction.id == cursor_id)
+            .scalar_subquery()
+        )
+        stmt = stmt.where(
+            tuple_(DistributedTransaction.created_at, DistributedTransaction.id)
+            < tuple_(cursor_created_at, cursor_id)
+        )
+    stmt = stmt.limit(limit)
 
-    stmt = (
-        select(DistributedTransaction)
-        .order_by(desc(DistributedTransaction.created_at))
-        .limit(limit)
-    )
     result = await db.execute(stmt)
-    transactions = result.scalars().all()
 
-    return [
+    transactions = [
         {
-            "transaction_id": tx.id,
-            "status": tx.status.value,
-            "operation_type": tx.operation_type,
-            "created_at": tx.created_at.isoformat(),
-            "timeout_at": tx.timeout_at.isoformat()
-            if tx.timeout_at
-            else None,
-            "participants": len(tx.participant_urls),
+            "transaction_id": tx_id,
+            "status": status.value,
+            "operation_type": operation_type,
+            "created_at": created_at,
+            "timeout_at": timeout_at,
+            "participants": participants,
         }
-        for tx in transactions
+        for tx_id, status, operation_type, created_at, timeout_at, participants in result
     ]
 
+    return {
+        "transactions": transactions,
+        "next_cursor": (
+            transactions[-1]["transaction_id"]
+            if len(transactions) == limit
+            else None
+        ),
+    }
+
 
 @router.get("/nodes")
 async def get_nodes_status():
@@ -205,28 +205,4 @@ async def get_nodes_status():
             detail="Only coordinator can view node status",
         )
 
-    nodes = []
-
-    for node_id, info in settings.nodes.items():
-        status = "unknown"
-        last_heartbeat = None
-        uptime = 0
-
-        if failure_detector and node_id in failure_detector.node_health:
-            health = failure_detector.node_health[node_id]
-            status = health["status"]
-            last_heartbeat = health["last_heartbeat"]
-            uptime = health["uptime"]
-
-        nodes.append(
-            NodeStatus(
-                node_id=node_id,
-                role=info["role"],
-                url=info["url"],
-                status=status,
-                last_heartbeat=last_heartbeat,
-                uptime=uptime,
-            )
-        )
-
-    return nodes
+    return list(failure_detector.nodes_snapshot)
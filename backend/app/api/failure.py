@@ -5,18 +5,28 @@ import signal
 
 router = APIRouter()
 
+# Applied to every request by the delay middleware in main.py, before any
+# dependency runs, so a delayed request holds no database session.
+injected_delay_ms = 0
+
 @router.post("/inject/crash")
-async def inject_crash():
-    """Immediately crash this node (for demo)"""
-    await asyncio.sleep(0.1)
-    os.kill(os.getpid(), signal.SIGKILL)
+async def inject_crash(hard: bool = False):
+    """
+    Crash this node (for demo).
+
+    By default the node gets SIGTERM so the lifespan shutdown runs and
+    database connections are closed cleanly; hard=true sends SIGKILL.
+    """
+    sig = signal.SIGKILL if hard else signal.SIGTERM
+    asyncio.get_running_loop().call_later(0.1, os.kill, os.getpid(), sig)
     return {"message": "Crashing node..."}
 
 @router.post("/inject/delay")
 async def inject_delay(duration_ms: int = 5000):
-    """Delay all responses for duration_ms"""
-    await asyncio.sleep(duration_ms / 1000)
-    return {"message": f"Delayed response after {duration_ms}ms"}
+    """Delay all responses for duration_ms (0 turns the delay off)"""
+    global injected_delay_ms
+    injected_delay_ms = max(duration_ms, 0)
+    return {"message": f"Responses now delayed by {injected_delay_ms}ms"}
 
 @router.post("/inject/reject")
 async def inject_reject():
@@ -1,21 +1,37 @@
+import asyncio
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 from datetime import datetime
+from typing import List
 
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_db
 from ..config import settings
-from ..schemas import PrepareRequest, DecisionRequest, VoteResponse
-from ..services.participant_service import ParticipantService
+from ..schemas import (
+    PrepareRequest,
+    BatchPrepareRequest,
+    DecisionRequest,
+    BatchDecisionRequest,
+    HeartbeatRequest,
+    VoteResponse,
+)
+from ..services.participant_service import participant_service
+from ..services.recovery_manager import recovery_manager
 from ..models import Account
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
-participant_service = ParticipantService()
 
-@router.post("/prepare", response_model=VoteResponse)
-async def prepare(request: PrepareRequest, db: AsyncSession = Depends(get_db)):
-    if settings.node_role != "participant":
-        raise HTTPException(status_code=403, detail="Only participants accept prepare requests")
+_VOTE = TypeAdapter(VoteResponse)
 
+# Bounds the pooled sessions one prepare batch can hold at once
+_prepare_slots = asyncio.Semaphore(settings.max_concurrent_transactions)
+
+async def _vote(db: AsyncSession, request: PrepareRequest) -> VoteResponse:
     try:
         vote = await participant_service.prepare_transaction(
             db=db,
@@ -23,26 +39,55 @@ async def prepare(request: PrepareRequest, db: AsyncSession = Depends(get_db)):
             operation_type=request.operation_type,
             operation_data=request.operation_data
         )
-        return VoteResponse(
-            transaction_id=request.transaction_id,
-            vote=vote,
-            node_id=settings.node_id,
-            message="Prepared successfully" if vote == "yes" else "Cannot prepare"
-        )
+        return _VOTE.validate_python({
+            "transaction_id": request.transaction_id,
+            "vote": vote,
+            "node_id": settings.node_id,
+            "message": "Prepared successfully" if vote == "yes" else "Cannot prepare",
+        })
     except Exception as e:
-        return VoteResponse(
-            transaction_id=request.transaction_id,
-            vote="no",
-            node_id=settings.node_id,
-            message=str(e)
-        )
+        # Leave the session usable for the next operation in a batch
+        await db.rollback()
+        return _VOTE.validate_python({
+            "transaction_id": request.transaction_id,
+            "vote": "no",
+            "node_id": settings.node_id,
+            "message": str(e),
+        })
+
+async def _vote_in_own_session(request: PrepareRequest) -> VoteResponse:
+    async with _prepare_slots:
+        async with AsyncSessionLocal() as db:
+            return await _vote(db, request)
+
+@router.post("/prepare", response_model=VoteResponse)
+async def prepare(request: PrepareRequest, db: AsyncSession = Depends(get_db)):
+    if settings.node_role != "participant":
+        raise HTTPException(status_code=403, detail="Only participants accept prepare requests")
+
+    return await _vote(db, request)
+
+@router.post("/prepare_batch", response_model=List[VoteResponse])
+async def prepare_batch(request: BatchPrepareRequest):
+    if settings.node_role != "participant":
+        raise HTTPException(status_code=403, detail="Only participants accept prepare requests")
+
+    # Transactions in a batch are independent: prepare them concurrently,
+    # each on its own session since an AsyncSession is not concurrency-safe
+    return await asyncio.gather(
+        *(_vote_in_own_session(item) for item in request.transactions)
+    )
 
 @router.post("/commit")
 async def commit(request: DecisionRequest, db: AsyncSession = Depends(get_db)):
     if settings.node_role != "participant":
         raise HTTPException(status_code=403, detail="Only participants accept commit")
 
-    await participant_service.commit_transaction(db, request.transaction_id)
+    if not await participant_service.commit_transaction(db, request.transaction_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Transaction {request.transaction_id} is not prepared on this node",
+        )
     return {"status": "committed", "transaction_id": request.transaction_id}
 
 @router.post("/abort")
@@ -53,18 +98,54 @@ async def abort(request: DecisionRequest, db: AsyncSession = Depends(get_db)):
     await participant_service.abort_transaction(db, request.transaction_id)
     return {"status": "aborted", "transaction_id": request.transaction_id}
 
+@router.post("/decision_batch")
+async def decision_batch(request: BatchDecisionRequest, db: AsyncSession = Depends(get_db)):
+    if settings.node_role != "participant":
+        raise HTTPException(status_code=403, detail="Only participants accept decisions")
+
+    for item in request.decisions:
+        if item.decision == "commit":
+            await participant_service.commit_transaction(db, item.transaction_id)
+        else:
+            await participant_service.abort_transaction(db, item.transaction_id)
+    return {"status": "decided", "count": len(request.decisions)}
+
+@router.post("/heartbeat")
+async def heartbeat(request: HeartbeatRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Coordinator heartbeat. Commit decisions are piggybacked on it; the
+    prepared transactions listed are committed in order. Only the ones
+    actually committed here are acknowledged.
+    """
+    if settings.node_role != "participant":
+        raise HTTPException(status_code=403, detail="Only participants accept heartbeats")
+
+    applied = []
+    for transaction_id in request.committed:
+        try:
+            if await participant_service.commit_transaction(db, transaction_id):
+                applied.append(transaction_id)
+        except Exception:
+            # One failing commit must not drop the acks of the others; it
+            # stays unacknowledged and is retried on the next heartbeat
+            await db.rollback()
+            logger.exception(f"Commit of {transaction_id} failed")
+    return {
+        "status": "alive",
+        "node_id": settings.node_id,
+        "applied": applied,
+    }
+
 @router.post("/recover")
 async def recover(db: AsyncSession = Depends(get_db)):
     if settings.node_role != "participant":
         raise HTTPException(status_code=403, detail="Only participants can recover")
 
-    recovered = await participant_service.recover_uncertain_transactions(db)
+    recovered = await recovery_manager.recover(db)
     return {"message": "Recovery completed", "recovered_count": len(recovered)}
 
 @router.get("/accounts")
 async def list_accounts(db: AsyncSession = Depends(get_db)):
-    from sqlalchemy import select
-
     result = await db.execute(select(Account))
     accounts = result.scalars().all()
 
@@ -73,8 +154,8 @@ async def list_accounts(db: AsyncSession = Depends(get_db)):
             "id": a.id,
             "balance": a.balance,
             "node_id": a.node_id,
-            "created_at": a.created_at.isoformat() if a.created_at else None,
-            "updated_at": a.updated_at.isoformat() if a.updated_at else None,
+            "created_at": a.created_at,
+            "updated_at": a.updated_at,
         }
         for a in accounts
     ]
\ No newline at end of file
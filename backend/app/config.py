@@ -11,6 +11,7 @@ class Settings(BaseSettings):
     coordinator_url: str = ""
 
     database_url: str = ""
+    pgbouncer: bool = False
 
     prepare_timeout: int = 5000
     commit_timeout: int = 3000
@@ -20,6 +21,9 @@ class Settings(BaseSettings):
     max_concurrent_transactions: int = 10
     lock_timeout: int = 3000
 
+    batch_max_size: int = 64
+    batch_window_ms: int = 10
+
     log_level: str = "INFO"
     log_file: str = "logs/ftdt.log"
 
@@ -36,6 +40,17 @@ class Settings(BaseSettings):
             raise ValueError("DATABASE_URL must be set in .env file")
         if not self.node_id or not self.node_role or not self.port:
             raise ValueError("NODE_ID, NODE_ROLE, and PORT must be set")
+        if self.lock_timeout <= 0 or self.commit_timeout < 2:
+            raise ValueError("LOCK_TIMEOUT must be positive and COMMIT_TIMEOUT at least 2ms")
+
+    @property
+    def row_lock_timeout(self) -> int:
+        """
+        Row lock wait in ms for the prepare phase. Kept strictly below the
+        statement_timeout (commit_timeout), which would otherwise cancel
+        the statement before the lock wait times out.
+        """
+        return min(self.lock_timeout, self.commit_timeout // 2)
 
     @property
     def schema_name(self) -> str:
@@ -47,6 +62,9 @@ class Settings(BaseSettings):
     def get_node_url(self, node_id: str) -> Optional[str]:
         return node_registry.get_node_url(node_id)
 
+    def get_participant_url(self, node_id: str) -> Optional[str]:
+        return node_registry.get_participant_url(node_id)
+
     def get_coordinator_url(self) -> str:
         return node_registry.get_coordinator_url() or self.coordinator_url
 
@@ -3,23 +3,60 @@ from sqlalchemy.orm import declarative_base
 from sqlalchemy import event, text
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
+from uuid import uuid4
+import orjson
 from .config import settings
 
 
 Base = declarative_base()
 
+if settings.pgbouncer:
+    # PgBouncer (transaction pooling) owns the server connections: keep the
+    # local pool small and disable asyncpg's prepared statement caches.
+    # The dialect still prepares named statements, so give each a unique
+    # name that cannot collide on another server backend.
+    # PgBouncer rejects search_path as a startup parameter, so it must be
+    # set per database alias (connect_query); assert_search_path checks it.
+    pool_args = {"pool_size": 5, "max_overflow": 5}
+    connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+else:
+    pool_args = {"pool_size": 20, "max_overflow": 10}
+    connect_args = {
+        # SQLAlchemy-side cache of asyncpg prepared statements per connection
+        "prepared_statement_cache_size": 256,
+        "server_settings": {
+            "search_path": settings.schema_name,
+            # Bound runaway statements and sessions left idle in a transaction
+            # (e.g. a coordinator stalled on participant fanout)
+            "statement_timeout": str(settings.commit_timeout),
+            "idle_in_transaction_session_timeout": "5000",
+            "application_name": f"ftdt-{settings.node_id}",
+        }
+    }
+
+
+def _json_dumps(obj) -> str:
+    # The asyncpg JSON/JSONB codecs expect text
+    return orjson.dumps(obj).decode()
+
+
 engine = create_async_engine(
     settings.database_url,
     echo=False,
-    pool_size=10,
-    max_overflow=20,
+    pool_timeout=30,
     pool_pre_ping=True,
-    pool_recycle=1800,
-    connect_args={
-        "server_settings": {
-            "search_path": settings.schema_name
-        }
-    }
+    pool_recycle=3600,
+    # Room for every statement shape (incl. executemany/IN variants) so
+    # compiled SQL, and with it asyncpg's prepared statements, is reused
+    query_cache_size=1200,
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
+    connect_args=connect_args,
+    **pool_args,
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -38,17 +75,17 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     Important: Does NOT auto-commit. Caller must explicitly commit or rollback.
     This is necessary for 2PC protocol control.
     """
-    async with AsyncSessionLocal() as session:
-        try:
-            # Double-check schema is set
-            await session.execute(text(f"SET search_path TO {settings.schema_name}"))
-            yield session
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            # Only close the session, don't commit
-            await session.close()
+    session = AsyncSessionLocal()
+    try:
+        # search_path comes from server_settings at connect time and is
+        # verified once at startup by assert_search_path
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        # Only close the session, don't commit
+        await session.close()
 
 
 @asynccontextmanager
@@ -59,7 +96,6 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
     async with AsyncSessionLocal() as session:
         try:
-            await session.execute(text(f"SET search_path TO {settings.schema_name}"))
             yield session
         finally:
             await session.close()
@@ -84,8 +120,10 @@ async def init_db():
 async def check_db_health() -> bool:
     """Check if database connection is healthy."""
     try:
-        async with engine.begin() as conn:
-            await conn.execute(text("SELECT 1"))
+        async with engine.connect() as conn:
+            # Autocommit: no BEGIN/ROLLBACK around the probe
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql("SELECT 1")
         return True
     except Exception:
         return False
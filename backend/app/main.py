@@ -1,17 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.database import init_db, AsyncSessionLocal
+from app.database import init_db, engine, AsyncSessionLocal
 from app.api.coordinator import router as coordinator_router
 from app.api.participant import router as participant_router
 from app.api.health import router as health_router
 from app.api.failure import router as failure_router
-from app.services.failure_detector import FailureDetector
+from app.api import failure
+from app.services.failure_detector import failure_detector
 from app.services.recovery_manager import recovery_manager
+from app.services.coordinator_service import coordinator_service
 
 logging.basicConfig(
     level=getattr(logging, settings.log_level),
@@ -24,8 +28,6 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-failure_detector = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.node_role} node: {settings.node_id}")
@@ -43,19 +45,22 @@ async def lifespan(app: FastAPI):
         async with AsyncSessionLocal() as db:
             recovered = await recovery_manager.recover(db)
             if recovered:
-                logger.info(f"Recovery completed: aborted {len(recovered)} uncertain transactions")
+                logger.info(f"Recovery completed: resolved {len(recovered)} uncertain transactions")
             else:
                 logger.info("No uncertain transactions found during recovery")
 
-    global failure_detector
-    failure_detector = FailureDetector()
+    if settings.node_role == "coordinator":
+        await coordinator_service.start()
+
     await failure_detector.start()
 
     yield
 
     logger.info(f"Shutting down {settings.node_role} node: {settings.node_id}")
-    if failure_detector:
-        await failure_detector.stop()
+    await failure_detector.stop()
+    if settings.node_role == "coordinator":
+        await coordinator_service.stop()
+    await engine.dispose()
 
 
 app = FastAPI(
@@ -63,6 +68,7 @@ app = FastAPI(
     description="ICS 2403 Distributed Computing and Applications",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -73,6 +79,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class InjectDelayMiddleware:
+    """
+    Pure ASGI middleware applying the injected failure delay. With no delay
+    set it hands the request straight to the app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        delay_ms = failure.injected_delay_ms
+        # Leave the failure endpoints responsive so the delay can be switched off
+        if (
+            delay_ms
+            and scope["type"] == "http"
+            and not scope["path"].startswith("/api/failure")
+        ):
+            await asyncio.sleep(delay_ms / 1000)
+        await self.app(scope, receive, send)
+
+app.add_middleware(InjectDelayMiddleware)
+
 app.include_router(health_router, prefix="/api", tags=["health"])
 app.include_router(failure_router, prefix="/api/failure", tags=["failure"])
 
@@ -118,5 +146,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=settings.port,
         reload=True,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
\ No newline at end of file
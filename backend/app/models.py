@@ -1,7 +1,6 @@
-import uuid
-from datetime import datetime
 from enum import Enum
 from app.database import Base
+from app.utils.ids import uuid7
 
 from sqlalchemy import (
     Column,
@@ -14,7 +13,13 @@ from sqlalchemy import (
     Enum as SQLEnum,
     UniqueConstraint,
     Index,
+    Uuid,
+    text,
+    event,
+    DDL,
+    func,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 class TransactionStatus(str, Enum):
     INIT = "init"
     PREPARING = "preparing"
@@ -30,6 +35,25 @@ class LockType(str, Enum):
     WRITE = "write"
 
 
+# Timestamps are naive UTC; Postgres fills them in as part of the write
+UTC_NOW = text("timezone('utc', now())")
+
+# Native Postgres ENUM types: 4-byte values and comparisons in the
+# status indexes instead of VARCHAR + CHECK
+TransactionStatusType = SQLEnum(
+    TransactionStatus,
+    name="transaction_status_enum",
+    native_enum=True,
+    create_constraint=False,
+)
+LockTypeType = SQLEnum(
+    LockType,
+    name="lock_type_enum",
+    native_enum=True,
+    create_constraint=False,
+)
+
+
 class Account(Base):
     __tablename__ = "accounts"
     __table_args__ = (
@@ -40,8 +64,12 @@ class Account(Base):
     id = Column(String(50), primary_key=True, index=True)
     balance = Column(Integer, default=0, nullable=False)
     node_id = Column(String(50), nullable=False, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=UTC_NOW)
+    updated_at = Column(
+        DateTime,
+        server_default=UTC_NOW,
+        onupdate=func.timezone("utc", func.now()),
+    )
 
 
 class DistributedTransaction(Base):
@@ -49,19 +77,35 @@ class DistributedTransaction(Base):
     __table_args__ = (
         Index("idx_transaction_status", "status"),
         Index("idx_transaction_timeout", "timeout_at"),
+        # Keyset pagination of the transaction list
+        Index("idx_transaction_created_id", "created_at", "id"),
+        # Undecided transactions, for the coordinator's expiry sweep
+        Index(
+            "idx_tx_inflight",
+            "timeout_at",
+            postgresql_where=text(
+                "status IN ('INIT', 'PREPARING', 'PREPARED')"
+            ),
+        ),
+        # Decided commits awaiting participant acknowledgement (coordinator restart)
+        Index(
+            "idx_transaction_committing",
+            "decision_made_at",
+            postgresql_where=text("status = 'COMMITTING'"),
+        ),
     )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.INIT, index=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid7()))
+    status = Column(TransactionStatusType, default=TransactionStatus.INIT, index=True)
 
     operation_type = Column(String(50), nullable=False)
     operation_data = Column(JSON, nullable=False)
 
     participant_urls = Column(JSON, nullable=False)
-    participant_votes = Column(JSON, default=dict)
-    participant_decisions = Column(JSON, default=dict)
+    participant_votes = Column(JSONB, default=dict)
+    participant_decisions = Column(JSONB, default=dict)
 
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, server_default=UTC_NOW, index=True)
     prepare_started_at = Column(DateTime, nullable=True)
     decision_made_at = Column(DateTime, nullable=True)
     timeout_at = Column(DateTime, nullable=True)
@@ -76,26 +120,45 @@ class LocalTransaction(Base):
         UniqueConstraint("transaction_id", "node_id", name="uq_local_transaction"),
         Index("idx_local_transaction_status", "node_id", "status"),
         Index("idx_local_transaction_vote", "transaction_id", "vote"),
+        # Uncertain transactions resolved by crash recovery, oldest first
+        Index(
+            "idx_local_transaction_uncertain",
+            "node_id",
+            "prepared_at",
+            postgresql_where=text("status = 'PREPARED'"),
+        ),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     transaction_id = Column(String(36), nullable=False, index=True)
     node_id = Column(String(50), nullable=False, index=True)
 
-    status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.INIT, index=True)
+    status = Column(TransactionStatusType, default=TransactionStatus.INIT, index=True)
     vote = Column(String(10), nullable=True)
 
     operation_type = Column(String(50))
     operation_data = Column(JSON)
 
-    before_state = Column(JSON, nullable=True)
-    after_state = Column(JSON, nullable=True)
+    # Kept out of line (uncompressed TOAST) so status scans read narrow rows
+    before_state = Column(JSONB, nullable=True)
+    after_state = Column(JSONB, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=UTC_NOW)
     prepared_at = Column(DateTime, nullable=True)
     decided_at = Column(DateTime, nullable=True)
 
 
+event.listen(
+    LocalTransaction.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE %(table)s "
+        "ALTER COLUMN before_state SET STORAGE EXTERNAL, "
+        "ALTER COLUMN after_state SET STORAGE EXTERNAL"
+    ),
+)
+
+
 class TransactionLog(Base):
     __tablename__ = "transaction_logs"
     __table_args__ = (
@@ -108,25 +171,34 @@ class TransactionLog(Base):
     node_id = Column(String(50), nullable=False, index=True)
 
     log_type = Column(String(50), nullable=False)
-    old_state = Column(JSON, nullable=True)
-    new_state = Column(JSON, nullable=True)
+    old_state = Column(JSONB, nullable=True)
+    new_state = Column(JSONB, nullable=True)
     details = Column(Text, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, server_default=UTC_NOW, index=True)
     applied = Column(Boolean, default=False)
 
 
 class Lock(Base):
     __tablename__ = "locks"
     __table_args__ = (
-        UniqueConstraint(
-            "resource_type",
+        # At most one unreleased lock per resource; acquisition relies on
+        # this for INSERT ... ON CONFLICT DO NOTHING
+        Index(
+            "uq_lock_active_resource",
             "resource_id",
             "node_id",
-            "lock_type",
-            name="uq_lock_resource",
+            unique=True,
+            postgresql_where=text("released_at IS NULL"),
         ),
         Index("idx_lock_transaction", "transaction_id", "node_id"),
+        # Locks still held, looked up by owner on release
+        Index(
+            "idx_lock_held",
+            "transaction_id",
+            "node_id",
+            postgresql_where=text("released_at IS NULL"),
+        ),
         Index("idx_lock_resource", "resource_type", "resource_id", "node_id"),
         Index("idx_lock_active", "released_at"),
     )
@@ -137,8 +209,8 @@ class Lock(Base):
     resource_id = Column(String(100), nullable=False)
     node_id = Column(String(50), nullable=False, index=True)
 
-    lock_type = Column(SQLEnum(LockType), nullable=False)
+    lock_type = Column(LockTypeType, nullable=False)
     transaction_id = Column(String(36), nullable=False, index=True)
 
-    acquired_at = Column(DateTime, default=datetime.utcnow)
+    acquired_at = Column(DateTime, server_default=UTC_NOW)
     released_at = Column(DateTime, nullable=True)
\ No newline at end of file
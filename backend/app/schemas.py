@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 
 class TransactionStatus(str, Enum):
     INIT = "init"
@@ -27,6 +27,10 @@ class PrepareRequest(BaseModel):
     operation_data: Dict[str, Any] = Field(..., description="Operation details")
 
 
+class BatchPrepareRequest(BaseModel):
+    transactions: List[PrepareRequest] = Field(..., description="Operations to prepare in one round")
+
+
 class VoteResponse(BaseModel):
     transaction_id: str
     vote: str = Field(..., pattern="^(yes|no)$")
@@ -39,11 +43,27 @@ class DecisionRequest(BaseModel):
     decision: str = Field(..., pattern="^(commit|abort)$")
 
 
+class BatchDecisionRequest(BaseModel):
+    decisions: List[DecisionRequest]
+
+
+class HeartbeatRequest(BaseModel):
+    last_committed: Optional[str] = None
+    last_committed_index: int = 0
+    committed: List[str] = Field(default_factory=list, description="Decided commits, oldest first")
+
+
 class TransactionStatusResponse(BaseModel):
-    transaction_id: str
+    model_config = ConfigDict(from_attributes=True)
+
+    transaction_id: str = Field(validation_alias=AliasChoices("transaction_id", "id"))
     status: TransactionStatus
-    votes: Dict[str, Optional[str]] = {}
-    decisions: Dict[str, Optional[str]] = {}
+    votes: Dict[str, Optional[str]] = Field(
+        default={}, validation_alias=AliasChoices("votes", "participant_votes")
+    )
+    decisions: Dict[str, Optional[str]] = Field(
+        default={}, validation_alias=AliasChoices("decisions", "participant_decisions")
+    )
     created_at: datetime
     timeout_at: Optional[datetime] = None
 
@@ -52,7 +72,7 @@ class NodeStatus(BaseModel):
     node_id: str
     role: str
     url: str
-    status: str = Field(..., pattern="^(online|offline|recovering)$")
+    status: str = Field(..., pattern="^(online|offline|recovering|unknown)$")
     last_heartbeat: Optional[datetime] = None
     uptime: Optional[int] = None
 
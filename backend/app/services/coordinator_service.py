@@ -1,123 +1,507 @@
 import asyncio
+import logging
+from collections import defaultdict
 from datetime import datetime
 import httpx
+import orjson
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.schemas import DecisionRequest, TransactionStatus
+from app.database import AsyncSessionLocal
+from app.schemas import TransactionStatus
 from app.models import DistributedTransaction
 
+logger = logging.getLogger(__name__)
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Coordinator states with no decision logged yet
+_UNDECIDED = (
+    TransactionStatus.INIT,
+    TransactionStatus.PREPARING,
+    TransactionStatus.PREPARED,
+)
+
 
 class CoordinatorService:
 
-    def _derive_participant_operations(self, tx: DistributedTransaction):
+    def __init__(self):
+        self.queue = None
+        self.task = None
+        self.sweeper = None
+        # Transactions submitted to this process and not yet decided; the
+        # expiry sweep leaves them to the batch worker
+        self._inflight = set()
+        # Transactions pushed out of the last batch by an account conflict;
+        # they lead the next one
+        self._carried = []
+        self.client = None
+        # Caps in-flight participant RPCs so bursts queue here instead of
+        # oversubscribing the client's connection pool
+        self._outbound = asyncio.Semaphore(settings.max_concurrent_transactions * 2)
+        self._node_url = {
+            node_id: info["url"] for node_id, info in settings.nodes.items()
+        }
+
+        # Commit decisions not yet acknowledged by participants; they are
+        # piggybacked on heartbeats instead of dedicated /commit RPCs.
+        self.commit_index = 0
+        self.pending_commits = defaultdict(dict)  # url -> {transaction_id: index}
+        self._awaiting_ack = defaultdict(set)     # transaction_id -> {url}
+        # Set when commits are queued for a participant so its heartbeat
+        # goes out right away instead of on the next tick
+        self._commits_ready = defaultdict(asyncio.Event)  # url -> Event
+
+    async def start(self):
+        # One keep-alive pool for all participant RPCs over the process lifetime
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.prepare_timeout / 1000),
+            limits=httpx.Limits(
+                max_keepalive_connections=64,
+                max_connections=256,
+                keepalive_expiry=60,
+            ),
+        )
+
+        # Rows left undecided by a crash would otherwise keep participant
+        # locks forever; presume abort before reloading pending commits
+        await self.abort_expired()
+        async with AsyncSessionLocal() as db:
+            await self._reload_pending_commits(db)
+
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._batch_worker())
+        self.sweeper = asyncio.create_task(self._sweep_expired())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+        if self.sweeper:
+            self.sweeper.cancel()
+        if self.client:
+            await self.client.aclose()
+
+    async def _post(self, url: str, payload: dict, timeout: float):
+        """POST to a participant. Transport errors come back as None."""
+        try:
+            async with self._outbound:
+                return await self.client.post(
+                    url,
+                    content=orjson.dumps(payload),
+                    headers=_JSON_HEADERS,
+                    timeout=timeout,
+                )
+        except httpx.HTTPError:
+            return None
+
+    async def submit(self, transaction: dict) -> asyncio.Future:
         """
-        Split a global transfer into participant-local operations.
+        Queue a new transaction row for the next 2PC batch.
 
-        Returns:
-            dict[url -> { local_account, local_delta }]
+        Returns once the row is durable: rows in a batch are inserted with
+        a single statement and commit (group commit). The returned future
+        resolves to the decided transaction status, or None if the batch
+        failed before a decision was reached.
         """
-        op = tx.operation_data
-        amount = op["amount"]
+        loop = asyncio.get_running_loop()
+        persisted = loop.create_future()
+        outcome = loop.create_future()
+        self._inflight.add(transaction["id"])
+        await self.queue.put((transaction, persisted, outcome))
+        await persisted
+        return outcome
 
-        operations = {}
+    async def _batch_worker(self):
+        """
+        Drain the queue in micro-batches: block for the first transaction,
+        then keep collecting until the batch window closes or the batch is full.
+        Transactions touching an account already in the batch wait for the next.
+        """
+        loop = asyncio.get_running_loop()
 
-        # Debit source participant
-        from_node = op["from_node"]
-        from_url = settings.nodes[from_node]["url"]
-        operations[from_url] = {
-            "local_account": op["from_account"],
-            "local_delta": -amount,
-        }
+        while True:
+            batch = self._carried or [await self.queue.get()]
+            deadline = loop.time() + settings.batch_window_ms / 1000
 
-        # Credit destination participant
-        to_node = op["to_node"]
-        to_url = settings.nodes[to_node]["url"]
-        operations[to_url] = {
-            "local_account": op["to_account"],
-            "local_delta": amount,
-        }
+            while len(batch) < settings.batch_max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout=remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
 
-        return operations
+            batch, self._carried = self._split_conflicts(batch)
 
-    async def execute_2pc(self, db: AsyncSession, transaction_id: str):
-        tx = await db.get(DistributedTransaction, transaction_id)
-        if not tx:
-            return
+            outcomes = {}
+            try:
+                async with AsyncSessionLocal() as db:
+                    try:
+                        await self._persist_batch(db, batch)
+                        outcomes = await self.execute_2pc_batch(
+                            db=db,
+                            transactions=[row for row, _, _ in batch],
+                        )
+                    except Exception:
+                        await db.rollback()
+                        raise
+            except Exception as e:
+                logger.exception(f"2PC batch of {len(batch)} transactions failed")
+                for _, persisted, _ in batch:
+                    if not persisted.done():
+                        persisted.set_exception(e)
 
-        participant_ops = self._derive_participant_operations(tx)
+            for row, _, outcome in batch:
+                self._inflight.discard(row["id"])
+                if not outcome.done():
+                    outcome.set_result(outcomes.get(row["id"]))
 
-        votes = {}
-        all_yes = True
+    async def abort_expired(self) -> list:
+        """
+        Presume abort for transactions past their timeout_at that never got
+        a decision and are not being run by this process, e.g. rows left
+        behind by a coordinator crash. Their participants are sent the
+        abort so they release their locks. Returns the aborted ids.
+        """
+        now = datetime.utcnow()
+        stmt = (
+            update(DistributedTransaction)
+            .where(
+                DistributedTransaction.status.in_(_UNDECIDED),
+                DistributedTransaction.timeout_at < now,
+            )
+            .values(status=TransactionStatus.ABORTED, decision_made_at=now)
+            .returning(
+                DistributedTransaction.id,
+                DistributedTransaction.participant_urls,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if self._inflight:
+            stmt = stmt.where(DistributedTransaction.id.notin_(self._inflight))
 
-        #  Phase 1: PREPARE
-        async with httpx.AsyncClient(
-            timeout=settings.prepare_timeout / 1000
-        ) as client:
-
-            tasks = []
-            urls = []
-
-            for url, local_op in participant_ops.items():
-                payload = {
-                    "transaction_id": transaction_id,
-                    "operation_type": "transfer",
-                    "operation_data": {
-                        "local_account": local_op["local_account"],
-                        "local_delta": local_op["local_delta"],
-                    },
-                }
-                urls.append(url)
-                tasks.append(
-                    client.post(f"{url}/api/prepare", json=payload)
-                )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(stmt)
+            rows = result.all()
+            await db.commit()
+
+        aborts = defaultdict(list)
+        for tid, participant_urls in rows:
+            for url in participant_urls:
+                aborts[url].append({"transaction_id": tid, "decision": "abort"})
+        await self._send_aborts(aborts)
+
+        if rows:
+            logger.info(f"Presumed abort for {len(rows)} expired undecided transactions")
+        return [tid for tid, _ in rows]
+
+    async def _sweep_expired(self):
+        """Run abort_expired every prepare_timeout for the process lifetime."""
+        while True:
+            await asyncio.sleep(settings.prepare_timeout / 1000)
+            try:
+                await self.abort_expired()
+            except Exception:
+                logger.exception("Sweeping expired transactions failed")
+
+    async def _send_aborts(self, aborts: dict):
+        """Send each participant its abort decisions in one RPC."""
+        if not aborts:
+            return
 
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
+        async with asyncio.TaskGroup() as tg:
+            for url, decisions_for_url in aborts.items():
+                tg.create_task(
+                    self._post(
+                        f"{url}/api/decision_batch",
+                        {"decisions": decisions_for_url},
+                        timeout=settings.commit_timeout / 1000,
+                    )
+                )
 
-        for resp, url in zip(responses, urls):
-            if isinstance(resp, Exception) or resp.status_code != 200:
-                votes[url] = "no"
-                all_yes = False
+    def _split_conflicts(self, batch: list):
+        """
+        Split a batch into transactions that can prepare together and those
+        that must wait. A participant holds its write locks from PREPARE
+        until the round's decision, so a second transaction on the same
+        (node, account) could only time out into a "no" vote and stall
+        the participant's whole batch response.
+        """
+        taken = set()
+        ready, deferred = [], []
+        for item in batch:
+            op = item[0]["operation_data"]
+            accounts = {
+                (op["from_node"], op["from_account"]),
+                (op["to_node"], op["to_account"]),
+            }
+            if accounts & taken:
+                deferred.append(item)
             else:
-                vote = resp.json().get("vote", "no")
-                votes[url] = vote
-                if vote != "yes":
-                    all_yes = False
-
-        tx.participant_votes = votes
-        tx.status = (
-            TransactionStatus.COMMITTING
-            if all_yes
-            else TransactionStatus.ABORTING
+                taken |= accounts
+                ready.append(item)
+        return ready, deferred
+
+    async def _persist_batch(self, db: AsyncSession, batch: list):
+        """Insert every row in the batch with one statement and one commit."""
+        await db.execute(
+            insert(DistributedTransaction),
+            [row for row, _, _ in batch],
         )
         await db.commit()
 
-        # Phase 2: COMMIT / ABORT
-        decision = "commit" if all_yes else "abort"
+        for _, persisted, _ in batch:
+            if not persisted.done():
+                persisted.set_result(None)
 
-        async with httpx.AsyncClient(
-            timeout=settings.commit_timeout / 1000
-        ) as client:
+    def _record_commits(self, url: str, transaction_ids: list[str]):
+        for tid in transaction_ids:
+            self.commit_index += 1
+            self.pending_commits[url][tid] = self.commit_index
+            self._awaiting_ack[tid].add(url)
+        if transaction_ids:
+            self._commits_ready[url].set()
 
-            tasks = []
-            for url in participant_ops.keys():
-                req = DecisionRequest(
-                    transaction_id=transaction_id,
-                    decision=decision,
+    async def wait_for_commits(self, url: str, timeout: float):
+        """
+        Sleep up to timeout seconds, returning early once commit decisions
+        are queued for url.
+        """
+        ready = self._commits_ready[url]
+        try:
+            await asyncio.wait_for(ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        # Cleared before the next payload is built, so decisions recorded
+        # after this point trigger another heartbeat
+        ready.clear()
+
+    async def _reload_pending_commits(self, db: AsyncSession):
+        """
+        Rebuild the undelivered commit decisions after a coordinator restart.
+        COMMITTING means the decision is durable but not yet acknowledged.
+        """
+        result = await db.execute(
+            select(
+                DistributedTransaction.id,
+                DistributedTransaction.operation_data,
+            )
+            .where(DistributedTransaction.status == TransactionStatus.COMMITTING)
+            .order_by(DistributedTransaction.decision_made_at)
+        )
+        for tid, operation_data in result:
+            for url in self._derive_participant_operations(operation_data):
+                self._record_commits(url, [tid])
+
+    def heartbeat_payload(self, url: str) -> dict:
+        """Commit decisions to piggyback on the next heartbeat to url."""
+        pending = self.pending_commits.get(url)
+        if not pending:
+            return {
+                "last_committed": None,
+                "last_committed_index": self.commit_index,
+                "committed": [],
+            }
+
+        committed = list(pending.keys())
+        return {
+            "last_committed": committed[-1],
+            "last_committed_index": pending[committed[-1]],
+            "committed": committed,
+        }
+
+    async def ack_commits(self, url: str, applied: list[str]):
+        """
+        Drop decisions a participant reports as committed. Transactions
+        acknowledged by every participant are marked COMMITTED; the rest
+        stay pending and ride on the next heartbeat again.
+
+        The COMMITTED update runs before any bookkeeping changes, so if it
+        fails every ack stays pending and is retried on a later heartbeat.
+        """
+        pending = self.pending_commits.get(url)
+        if not pending:
+            return
+
+        acked = [tid for tid in applied if tid in pending]
+        completed = [
+            tid for tid in acked if self._awaiting_ack[tid] <= {url}
+        ]
+
+        if completed:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(DistributedTransaction)
+                    .where(DistributedTransaction.id.in_(completed))
+                    .values(status=TransactionStatus.COMMITTED)
                 )
-                tasks.append(
-                    client.post(f"{url}/api/{decision}", json=req.dict())
+                await db.commit()
+
+        for tid in acked:
+            del pending[tid]
+            waiting = self._awaiting_ack[tid]
+            waiting.discard(url)
+            if not waiting:
+                del self._awaiting_ack[tid]
+
+    def _derive_participant_operations(self, op: dict):
+        """
+        Split a global transfer into participant-local operations.
+
+        Both legs of a same-node transfer go to one participant, so each
+        operation carries every account delta for that node.
+
+        Returns:
+            dict[url -> { local_deltas: {account_id: delta} }]
+        """
+        amount = op["amount"]
+        operations = {}
+
+        for node_id, account_id, delta in (
+            # Debit source participant
+            (op["from_node"], op["from_account"], -amount),
+            # Credit destination participant
+            (op["to_node"], op["to_account"], amount),
+        ):
+            url = self._node_url[node_id]
+            deltas = operations.setdefault(url, {"local_deltas": {}})["local_deltas"]
+            deltas[account_id] = deltas.get(account_id, 0) + delta
+
+        return operations
+
+    async def execute_2pc_batch(self, db: AsyncSession, transactions: list[dict]):
+        """
+        Run one 2PC round for a group of already-persisted transactions,
+        given as dicts with id, operation_type and operation_data.
+
+        Every participant receives a single PREPARE RPC carrying all of its
+        operations in the batch. Commit decisions are delivered on the next
+        heartbeat; aborts go out as a single decision RPC per participant.
+
+        Returns:
+            dict[transaction_id -> decided TransactionStatus]
+        """
+        # Must run on its own session, never one borrowed from a request
+        assert not db.in_transaction(), "execute_2pc_batch needs a fresh session"
+
+        return await self._run_2pc_round(db, transactions)
+
+    async def _run_2pc_round(self, db: AsyncSession, txs: list[dict]):
+        if not txs:
+            return {}
+
+        prepare_batches = defaultdict(list)
+        for tx in txs:
+            operations = self._derive_participant_operations(tx["operation_data"])
+            for url, local_op in operations.items():
+                prepare_batches[url].append({
+                    "transaction_id": tx["id"],
+                    "operation_type": tx["operation_type"],
+                    "operation_data": local_op,
+                })
+
+        urls = list(prepare_batches.keys())
+        votes = {tx["id"]: {} for tx in txs}
+
+        #  Phase 1: PREPARE
+        pending = {
+            asyncio.create_task(
+                self._post(
+                    f"{url}/api/prepare_batch",
+                    {"transactions": prepare_batches[url]},
+                    timeout=settings.prepare_timeout / 1000,
+                )
+            ): url
+            for url in urls
+        }
+        doomed = set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.prepare_timeout / 1000
+
+        try:
+            # Stop waiting once every transaction in the batch has a "no",
+            # or when the PREPARE deadline passes
+            while pending and len(doomed) < len(txs):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
+                for task in done:
+                    url = pending.pop(task)
+                    resp = task.result()
+                    received = {}
+                    if resp is not None and resp.status_code == 200:
+                        received = {
+                            v["transaction_id"]: v.get("vote", "no")
+                            for v in resp.json()
+                        }
+                    for op in prepare_batches[url]:
+                        tid = op["transaction_id"]
+                        votes[tid][url] = received.get(tid, "no")
+                        if votes[tid][url] != "yes":
+                            doomed.add(tid)
+        finally:
+            for task in pending:
+                task.cancel()
 
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # Votes never received (cancelled or past the deadline) count as "no"
+        for url in pending.values():
+            for op in prepare_batches[url]:
+                votes[op["transaction_id"]].setdefault(url, "no")
 
-        tx.status = (
-            TransactionStatus.COMMITTED
-            if all_yes
-            else TransactionStatus.ABORTED
+        decisions = {}
+        outcomes = {}
+        decided_at = datetime.utcnow()
+        for tid, tx_votes in votes.items():
+            all_yes = all(vote == "yes" for vote in tx_votes.values())
+            decisions[tid] = "commit" if all_yes else "abort"
+            # Aborts are final as soon as they are logged (presumed abort),
+            # so they skip ABORTING and need no second write
+            outcomes[tid] = (
+                TransactionStatus.COMMITTING
+                if all_yes
+                else TransactionStatus.ABORTED
+            )
+
+        # One executemany UPDATE logs every decision in the batch
+        await db.execute(
+            update(DistributedTransaction),
+            [
+                {
+                    "id": tid,
+                    "participant_votes": votes[tid],
+                    "status": outcomes[tid],
+                    "decision_made_at": decided_at,
+                }
+                for tid in outcomes
+            ],
         )
-        tx.decision_made_at = datetime.utcnow()
         await db.commit()
 
+        # Phase 2: commit decisions ride on the failure detector's
+        # heartbeats; only aborts are sent explicitly so locks free up now.
+        aborts = defaultdict(list)
+        for url, ops in prepare_batches.items():
+            committed = []
+            for op in ops:
+                tid = op["transaction_id"]
+                if decisions[tid] == "commit":
+                    committed.append(tid)
+                else:
+                    aborts[url].append({"transaction_id": tid, "decision": "abort"})
+            self._record_commits(url, committed)
+
+        await self._send_aborts(aborts)
+
+        return outcomes
+
 
 coordinator_service = CoordinatorService()
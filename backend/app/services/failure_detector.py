@@ -1,45 +1,106 @@
 import asyncio
+import logging
 import httpx
+import orjson
 from datetime import datetime
 
 from ..config import settings
+from ..schemas import NodeStatus
+from .coordinator_service import coordinator_service
+
+logger = logging.getLogger(__name__)
+
+# Heartbeats to an unreachable participant back off up to this many intervals
+MAX_BACKOFF_FACTOR = 8
 
 class FailureDetector:
     def __init__(self):
-        self.node_health = {}
-        self.task = None
+        # Health is kept as parallel lists indexed by node position
+        self._node_ids = list(settings.nodes)
+        self._idx = {node_id: i for i, node_id in enumerate(self._node_ids)}
+        self._url_idx = {
+            info["url"]: self._idx[node_id]
+            for node_id, info in settings.nodes.items()
+        }
+        self._status = ["unknown"] * len(self._node_ids)
+        self._last_hb = [None] * len(self._node_ids)
+        self._uptime = [0] * len(self._node_ids)
+
+        self.nodes_snapshot = ()
+        self.tasks = []
+        self._refresh_snapshot()
 
     async def start(self):
         if settings.node_role == "coordinator":
-            self.task = asyncio.create_task(self._monitor_participants())
-
-    async def _monitor_participants(self):
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            while True:
-                current_time = datetime.utcnow()
-                for url in settings.get_participant_urls():
-                    node_id = next((k for k, v in settings.nodes.items() if v["url"] == url), "unknown")
-                    try:
-                        response = await client.get(f"{url}/api/health")
-                        if response.status_code == 200:
-                            self.node_health[node_id] = {
-                                "status": "online",
-                                "last_heartbeat": current_time,
-                                "uptime": self.node_health.get(node_id, {}).get("uptime", 0) + 1
-                            }
-                    except Exception:
-                        self.node_health[node_id] = {
-                            "status": "offline",
-                            "last_heartbeat": self.node_health.get(node_id, {}).get("last_heartbeat"),
-                            "uptime": self.node_health.get(node_id, {}).get("uptime", 0)
-                        }
-                        print(f"Participant {url} ({node_id}) appears down")
-
-                await asyncio.sleep(settings.heartbeat_interval / 1000)
+            self.tasks = [
+                asyncio.create_task(self._probe(url))
+                for url in settings.get_participant_urls()
+            ]
+
+    async def _probe(self, url: str):
+        """
+        Heartbeat one participant forever, immediately whenever commit
+        decisions are waiting for it. Unreachable participants are
+        retried with exponential backoff, reset on the next success.
+        """
+        i = self._url_idx[url]
+        base_interval = settings.heartbeat_interval / 1000
+        interval = base_interval
+
+        while True:
+            try:
+                response = await coordinator_service.client.post(
+                    f"{url}/api/heartbeat",
+                    content=orjson.dumps(coordinator_service.heartbeat_payload(url)),
+                    headers={"content-type": "application/json"},
+                    timeout=settings.heartbeat_timeout / 1000,
+                )
+            except httpx.HTTPError:
+                response = None
+                self._status[i] = "offline"
+                interval = min(interval * 2, base_interval * MAX_BACKOFF_FACTOR)
+                logger.warning(f"Participant {url} ({self._node_ids[i]}) appears down")
+
+            if response is not None and response.status_code == 200:
+                self._status[i] = "online"
+                self._last_hb[i] = datetime.utcnow()
+                self._uptime[i] += 1
+                interval = base_interval
+                # A coordinator-side failure says nothing about the
+                # participant; the acks stay pending for the next heartbeat
+                try:
+                    await coordinator_service.ack_commits(
+                        url, response.json().get("applied", [])
+                    )
+                except Exception:
+                    logger.exception(f"Recording commit acks from {url} failed")
+
+            self._refresh_snapshot()
+            if interval == base_interval:
+                # Commit decisions wake the probe early so participants
+                # release their locks without waiting for the timer
+                await coordinator_service.wait_for_commits(url, interval)
+            else:
+                await asyncio.sleep(interval)
+
+    def _refresh_snapshot(self):
+        """Rebuild the node status list served by /nodes and swap it in."""
+        nodes = settings.nodes
+        self.nodes_snapshot = tuple(
+            NodeStatus(
+                node_id=node_id,
+                role=nodes[node_id]["role"],
+                url=nodes[node_id]["url"],
+                status=self._status[i],
+                last_heartbeat=self._last_hb[i],
+                uptime=self._uptime[i],
+            )
+            for i, node_id in enumerate(self._node_ids)
+        )
 
     async def stop(self):
-        if self.task:
-            self.task.cancel()
+        for task in self.tasks:
+            task.cancel()
 
 # Global singleton instance
-failure_detector = FailureDetector()
\ No newline at end of file
+failure_detector = FailureDetector()
@@ -1,70 +1,105 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
 import asyncio
+import random
+import time
 
-from app.models import Lock, LockType, TransactionStatus
+from app.models import UTC_NOW, Lock, LockType, TransactionStatus
 from app.config import settings
 
+# Retry backoff while a conflicting lock is held (seconds)
+LOCK_BACKOFF_INITIAL = 0.002
+LOCK_BACKOFF_MAX = 0.1
+
 class LockManager:
     """Strict Two-Phase Locking with timeout-based deadlock prevention."""
 
-    async def acquire_write_lock(
+    async def acquire_write_locks(
         self,
         db: AsyncSession,
         transaction_id: str,
-        resource_id: str,
+        resource_ids: list[str],
         timeout_ms: int = None
     ) -> bool:
-        """Acquire write lock on resource. Returns True if successful."""
+        """
+        Acquire write locks on all resources or none. Returns True if successful.
+
+        Resources are locked in sorted order with one INSERT per attempt, so
+        every transaction requests them in the same global order.
+        """
         timeout_ms = timeout_ms or settings.lock_timeout
+        resource_ids = sorted(set(resource_ids))
 
-        start_time = datetime.utcnow()
-        while (datetime.utcnow() - start_time).total_seconds() * 1000 < timeout_ms:
-            # Check if any conflicting lock exists (write or read)
-            query = select(Lock).where(
-                and_(
-                    Lock.resource_id == resource_id,
-                    Lock.node_id == settings.node_id,
-                    Lock.released_at.is_(None)
+        delay = LOCK_BACKOFF_INITIAL
+        # Monotonic clock: cheap to read and immune to wall-clock jumps
+        deadline = time.monotonic() + timeout_ms / 1000
+        while time.monotonic() < deadline:
+            # One statement both checks for conflicting locks and takes the
+            # free ones; the partial unique index makes concurrent inserts
+            # race-free
+            stmt = (
+                insert(Lock)
+                .values([
+                    {
+                        "resource_type": "account",
+                        "resource_id": resource_id,
+                        "node_id": settings.node_id,
+                        "lock_type": LockType.WRITE,
+                        "transaction_id": transaction_id,
+                    }
+                    for resource_id in resource_ids
+                ])
+                .on_conflict_do_nothing(
+                    index_elements=[Lock.resource_id, Lock.node_id],
+                    index_where=Lock.released_at.is_(None),
                 )
+                .returning(Lock.resource_id)
             )
-            result = await db.execute(query)
-            existing_lock = result.scalar_one_or_none()
+            result = await db.execute(stmt)
+            acquired = result.scalars().all()
+            if len(acquired) == len(resource_ids):
+                return True
 
-            if not existing_lock:
-                # No conflict — acquire lock
-                new_lock = Lock(
-                    resource_type="account",
-                    resource_id=resource_id,
-                    node_id=settings.node_id,
-                    lock_type=LockType.WRITE,
-                    transaction_id=transaction_id
+            if acquired:
+                # Holding a subset out of order could deadlock with another
+                # transaction; give it back and retry the whole set. The rows
+                # were never committed, so they are simply removed.
+                await db.execute(
+                    delete(Lock).where(
+                        Lock.transaction_id == transaction_id,
+                        Lock.node_id == settings.node_id,
+                        Lock.resource_id.in_(acquired),
+                        Lock.released_at.is_(None),
+                    )
                 )
-                db.add(new_lock)
-                await db.flush()
-                return True
 
-            # Conflict — wait a bit
-            await asyncio.sleep(0.1)
+            # Conflict — back off exponentially, with jitter so waiters
+            # on the same resource don't retry in lockstep
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, LOCK_BACKOFF_MAX)
 
         # Timeout
         return False
 
     async def release_all_locks(self, db: AsyncSession, transaction_id: str):
         """Release all locks held by transaction_id."""
-        query = select(Lock).where(
-            and_(
-                Lock.transaction_id == transaction_id,
-                Lock.released_at.is_(None)
-            )
-        )
-        result = await db.execute(query)
-        locks = result.scalars().all()
+        await self.release_locks(db, [transaction_id])
 
-        for lock in locks:
-            lock.released_at = datetime.utcnow()
+    async def release_locks(self, db: AsyncSession, transaction_ids: list[str]):
+        """Release every lock held by any of transaction_ids in one UPDATE."""
+        if not transaction_ids:
+            return
 
-        await db.flush()
+        await db.execute(
+            update(Lock)
+            .where(
+                Lock.transaction_id.in_(transaction_ids),
+                Lock.node_id == settings.node_id,
+                Lock.released_at.is_(None),
+            )
+            .values(released_at=UTC_NOW)
+            .execution_options(synchronize_session=False)
+        )
 
 lock_manager = LockManager()
\ No newline at end of file
@@ -1,10 +1,13 @@
 from datetime import datetime
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models import (
+    UTC_NOW,
     Account,
     LocalTransaction,
     TransactionStatus,
@@ -12,6 +15,11 @@ from app.models import (
 from app.services.lock_manager import lock_manager
 from app.services.transaction_manager import transaction_manager
 
+# SQLSTATE raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+# SQLSTATE raised when statement_timeout cancels the statement
+QUERY_CANCELED = "57014"
+
 
 class ParticipantService:
 
@@ -36,10 +44,9 @@ class ParticipantService:
             status=TransactionStatus.PREPARING,
             operation_type=operation_type,
             operation_data=operation_data,
-            created_at=datetime.utcnow(),
         )
+        # Inserted by the final commit together with the locks and logs
         db.add(local_tx)
-        await db.flush()
 
         if operation_type != "transfer":
             local_tx.status = TransactionStatus.PREPARED
@@ -48,52 +55,75 @@ class ParticipantService:
             await db.commit()
             return "yes"
 
-        # Participant-scoped operation
-        account_id = operation_data["local_account"]
-        delta = operation_data["local_delta"]
-        amount = abs(delta)
+        # Participant-scoped operation: every account this node touches
+        deltas = operation_data["local_deltas"]
+        account_ids = sorted(deltas)
 
-        # Acquire write lock
-        locked = await lock_manager.acquire_write_lock(
+        # Acquire all write locks in one statement
+        locked = await lock_manager.acquire_write_locks(
             db=db,
             transaction_id=transaction_id,
-            resource_id=account_id,
+            resource_ids=account_ids,
         )
         if not locked:
             await self._abort_prepare(db, local_tx, transaction_id)
             return "no"
 
-        # Load account with FOR UPDATE
+        # Load balances with FOR UPDATE, in lock order. Postgres bounds the
+        # row lock wait itself instead of letting the prepare hang.
         stmt = (
-            select(Account)
-            .where( 
-                Account.id == account_id,
+            select(Account.id, Account.balance)
+            .where(
+                Account.id.in_(account_ids),
                 Account.node_id == settings.node_id,
             )
+            .order_by(Account.id)
             .with_for_update()
         )
-        result = await db.execute(stmt)
-        account = result.scalar_one_or_none()
-
-        if not account:
+        try:
+            await db.execute(
+                text(f"SET LOCAL lock_timeout = '{int(settings.row_lock_timeout)}ms'")
+            )
+            result = await db.execute(stmt)
+        except DBAPIError as e:
+            if getattr(e.orig, "pgcode", None) not in (
+                LOCK_NOT_AVAILABLE,
+                QUERY_CANCELED,
+            ):
+                raise
+            # The timeout aborted the transaction and rolled back the lock
+            # rows; record the "no" vote in a fresh one
+            await db.rollback()
+            db.add(local_tx)
             await self._abort_prepare(db, local_tx, transaction_id)
             return "no"
+        balances = dict(result.all())
 
-        # Validation (ONLY for debit)
-        if delta < 0 and account.balance < amount:
+        if len(balances) != len(account_ids):
             await self._abort_prepare(db, local_tx, transaction_id)
             return "no"
 
-        # Write-Ahead Logging (prepare)
-        before = {"balance": account.balance}
-        after = {"balance": account.balance + delta}
-
-        await transaction_manager.log_prepare(
+        # Validation (ONLY for debit)
+        for account_id in account_ids:
+            delta = deltas[account_id]
+            if delta < 0 and balances[account_id] < -delta:
+                await self._abort_prepare(db, local_tx, transaction_id)
+                return "no"
+
+        # Write-Ahead Logging (prepare): one record per account, one INSERT
+        await transaction_manager.log_prepares(
             db=db,
             transaction_id=transaction_id,
-            before_state=before,
-            after_state=after,
-            details=f"account:{account_id}",
+            entries=[
+                {
+                    "before_state": {"balance": balances[account_id]},
+                    "after_state": {
+                        "balance": balances[account_id] + deltas[account_id]
+                    },
+                    "details": f"account:{account_id}",
+                }
+                for account_id in account_ids
+            ],
         )
 
         local_tx.status = TransactionStatus.PREPARED
@@ -102,43 +132,61 @@ class ParticipantService:
         await db.commit()
         return "yes"
 
-    async def commit_transaction(self, db: AsyncSession, transaction_id: str):
+    async def commit_transaction(self, db: AsyncSession, transaction_id: str) -> bool:
         """
         COMMIT phase:
         - Apply balance change
         - Write commit log
         - Release locks
+
+        Returns True if the transaction is committed on this node, now or by
+        an earlier delivery of the same decision.
         """
 
-        stmt = select(LocalTransaction).where(
-            and_(
+        # Decide and read the operation in one statement; the status guard
+        # makes a repeated or late commit a no-op
+        stmt = (
+            update(LocalTransaction)
+            .where(
                 LocalTransaction.transaction_id == transaction_id,
                 LocalTransaction.node_id == settings.node_id,
+                LocalTransaction.status == TransactionStatus.PREPARED,
+            )
+            .values(status=TransactionStatus.COMMITTED, decided_at=UTC_NOW)
+            .returning(
+                LocalTransaction.operation_type,
+                LocalTransaction.operation_data,
             )
+            .execution_options(synchronize_session=False)
         )
         result = await db.execute(stmt)
-        local_tx = result.scalar_one_or_none()
-
-        if not local_tx or local_tx.status != TransactionStatus.PREPARED:
-            return
-
-        if local_tx.operation_type == "transfer":
-            op = local_tx.operation_data
-            account_id = op["local_account"]
-            delta = op["local_delta"]
-
-            await self._apply_delta(
-                db=db,
-                account_id=account_id,
-                delta=delta,
+        row = result.first()
+
+        if row is None:
+            # A redelivered decision counts as applied; a transaction this
+            # node aborted or never prepared does not
+            status = await db.scalar(
+                select(LocalTransaction.status).where(
+                    LocalTransaction.transaction_id == transaction_id,
+                    LocalTransaction.node_id == settings.node_id,
+                )
             )
-
-        local_tx.status = TransactionStatus.COMMITTED
-        local_tx.decided_at = datetime.utcnow()
+            return status == TransactionStatus.COMMITTED
+
+        operation_type, operation_data = row
+        if operation_type == "transfer":
+            deltas = operation_data["local_deltas"]
+            for account_id in sorted(deltas):
+                await self._apply_delta(
+                    db=db,
+                    account_id=account_id,
+                    delta=deltas[account_id],
+                )
 
         await transaction_manager.log_commit(db, transaction_id)
         await lock_manager.release_all_locks(db, transaction_id)
         await db.commit()
+        return True
 
     async def abort_transaction(self, db: AsyncSession, transaction_id: str):
         """
@@ -148,71 +196,118 @@ class ParticipantService:
         - Write abort log
         """
 
-        stmt = select(LocalTransaction).where(
-            and_(
-                LocalTransaction.transaction_id == transaction_id,
-                LocalTransaction.node_id == settings.node_id,
+        aborted = await self._mark_aborted(db, transaction_id)
+
+        if not aborted:
+            # Either already decided, or the abort overtook a PREPARE the
+            # coordinator gave up on. Leave an ABORTED tombstone so a late
+            # PREPARE fails on uq_local_transaction instead of taking locks
+            # nobody releases.
+            stmt = (
+                insert(LocalTransaction)
+                .values(
+                    transaction_id=transaction_id,
+                    node_id=settings.node_id,
+                    status=TransactionStatus.ABORTED,
+                    vote="no",
+                    decided_at=UTC_NOW,
+                )
+                .on_conflict_do_nothing(constraint="uq_local_transaction")
+                .returning(LocalTransaction.id)
             )
-        )
-        result = await db.execute(stmt)
-        local_tx = result.scalar_one_or_none()
-
-        if not local_tx or local_tx.status in {
-            TransactionStatus.COMMITTED,
-            TransactionStatus.ABORTED,
-        }:
-            return
-
-        local_tx.status = TransactionStatus.ABORTED
-        local_tx.decided_at = datetime.utcnow()
+            result = await db.execute(stmt)
+            if result.first() is not None:
+                await db.commit()
+                return
+
+            # A row exists: either it was already decided, or a PREPARE
+            # committed it while we were inserting; abort the latter
+            aborted = await self._mark_aborted(db, transaction_id)
+            if not aborted:
+                await db.commit()
+                return
 
         await transaction_manager.log_abort(db, transaction_id)
         await lock_manager.release_all_locks(db, transaction_id)
         await db.commit()
 
-    async def recover_uncertain_transactions(self, db: AsyncSession) -> list:
+    async def _mark_aborted(self, db: AsyncSession, transaction_id: str) -> bool:
+        """Move an undecided local transaction to ABORTED. False if none."""
+        result = await db.execute(
+            update(LocalTransaction)
+            .where(
+                LocalTransaction.transaction_id == transaction_id,
+                LocalTransaction.node_id == settings.node_id,
+                LocalTransaction.status.notin_((
+                    TransactionStatus.COMMITTED,
+                    TransactionStatus.ABORTED,
+                )),
+            )
+            .values(status=TransactionStatus.ABORTED, decided_at=UTC_NOW)
+            .returning(LocalTransaction.id)
+            .execution_options(synchronize_session=False)
+        )
+        return result.first() is not None
+
+    async def prepared_transaction_ids(self, db: AsyncSession) -> list:
+        """Ids of the transactions prepared on this node but not yet decided."""
+        result = await db.execute(
+            select(LocalTransaction.transaction_id)
+            .where(
+                LocalTransaction.node_id == settings.node_id,
+                LocalTransaction.status == TransactionStatus.PREPARED,
+            )
+            .order_by(LocalTransaction.prepared_at)
+        )
+        return result.scalars().all()
+
+    async def abort_prepared(self, db: AsyncSession, transaction_ids: list) -> list:
         """
-        Recovery:
-        Abort all PREPARED transactions (conservative strategy)
+        Abort the given PREPARED transactions on this node with set-based
+        statements: one UPDATE, one lock release, one log INSERT.
+        The caller commits. Returns the aborted transaction ids.
         """
+        if not transaction_ids:
+            return []
 
-        stmt = select(LocalTransaction).where(
-            and_(
+        result = await db.execute(
+            update(LocalTransaction)
+            .where(
+                LocalTransaction.transaction_id.in_(transaction_ids),
                 LocalTransaction.node_id == settings.node_id,
                 LocalTransaction.status == TransactionStatus.PREPARED,
             )
+            .values(status=TransactionStatus.ABORTED, decided_at=UTC_NOW)
+            .returning(LocalTransaction.transaction_id)
+            .execution_options(synchronize_session=False)
         )
-        result = await db.execute(stmt)
-        transactions = result.scalars().all()
+        transaction_ids = result.scalars().all()
 
-        recovered = []
-        for tx in transactions:
-            await self.abort_transaction(db, tx.transaction_id)
-            recovered.append(tx.transaction_id)
-
-        return recovered
+        await lock_manager.release_locks(db, transaction_ids)
+        await transaction_manager.log_aborts(db, transaction_ids)
+        return transaction_ids
 
     async def _apply_delta(
         self,
         db: AsyncSession,
         account_id: str,
         delta: int,
-    ):
+    ) -> int:
+        """Apply delta in one UPDATE ... RETURNING; returns the new balance."""
+        # The UPDATE row lock is enough here; the account is already held by
+        # this transaction's write lock from PREPARE.
         stmt = (
-            select(Account)
+            update(Account)
             .where(
                 Account.id == account_id,
                 Account.node_id == settings.node_id,
-            )   
-            .with_for_update()
+            )
+            .values(balance=Account.balance + delta)
+            .returning(Account.balance)
+            .execution_options(synchronize_session=False)
         )
         result = await db.execute(stmt)
-        account = result.scalar_one()
-
-        account.balance += delta
-        account.updated_at = datetime.utcnow()
-        db.add(account)
-        await db.flush()
+        return result.scalar_one()
 
     async def _abort_prepare(
         self,
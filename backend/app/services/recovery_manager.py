@@ -1,11 +1,19 @@
+import asyncio
+import logging
+
+import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from datetime import datetime
 
-from app.models import LocalTransaction, TransactionStatus, TransactionLog
 from app.config import settings
+from app.models import TransactionStatus
 from app.services.participant_service import participant_service
-from app.services.lock_manager import lock_manager
+from app.services.transaction_manager import transaction_manager
+
+logger = logging.getLogger(__name__)
+
+# Coordinator states in which the outcome is already decided
+_COMMIT_STATES = {TransactionStatus.COMMITTING.value, TransactionStatus.COMMITTED.value}
+_ABORT_STATES = {TransactionStatus.ABORTING.value, TransactionStatus.ABORTED.value}
 
 class RecoveryManager:
     """
@@ -17,43 +25,92 @@ class RecoveryManager:
         if settings.node_role != "participant":
             return []
 
-        # Find uncertain transactions (PREPARED but no decision)
-        query = select(LocalTransaction).where(
-            and_(
-                LocalTransaction.node_id == settings.node_id,
-                LocalTransaction.status == TransactionStatus.PREPARED
-            )
-        )
-        result = await db.execute(query)
-        uncertain_txs = result.scalars().all()
+        transaction_ids = await participant_service.prepared_transaction_ids(db)
+        # End the read so each commit below starts its own transaction
+        await db.commit()
+        if not transaction_ids:
+            return []
 
-        recovered = []
+        # A PREPARED transaction may already be committed elsewhere, so its
+        # outcome is the coordinator's logged decision, not a local guess
+        decisions = await self._fetch_decisions(transaction_ids)
 
-        for tx in uncertain_txs:
-            # Conservative recovery: abort all uncertain transactions
-            # In advanced systems, could contact coordinator, but for this scope: abort
-            await participant_service.abort_transaction(db, tx.transaction_id)
-
-            # Clean up locks
-            await lock_manager.release_all_locks(db, tx.transaction_id)
-
-            recovered.append({
-                "transaction_id": tx.transaction_id,
-                "action": "aborted_due_to_recovery"
-            })
-
-            # Log recovery action
-            recovery_log = TransactionLog(
-                transaction_id=tx.transaction_id,
-                node_id=settings.node_id,
-                log_type="recovery_abort",
-                details="Aborted during crash recovery - uncertain state",
-                created_at=datetime.utcnow(),
-                applied=True
-            )
-            db.add(recovery_log)
+        recovered = []
+        to_abort = []
+        for transaction_id in transaction_ids:
+            decision = decisions.get(transaction_id)
+            if decision == "commit":
+                await participant_service.commit_transaction(db, transaction_id)
+                recovered.append({
+                    "transaction_id": transaction_id,
+                    "action": "committed_by_coordinator_decision",
+                })
+            elif decision == "abort":
+                to_abort.append(transaction_id)
+            else:
+                # Undecided or coordinator unreachable: stay PREPARED (and
+                # keep the locks) until the decision arrives. The coordinator
+                # presumes abort once timeout_at passes and sends it here.
+                logger.warning(
+                    f"Transaction {transaction_id} left PREPARED: no decision from coordinator"
+                )
 
+        aborted = await participant_service.abort_prepared(db, to_abort)
+        await transaction_manager.log_aborts(
+            db,
+            aborted,
+            log_type="recovery_abort",
+            details="Aborted during crash recovery - coordinator decided abort",
+        )
         await db.commit()
+
+        recovered.extend(
+            {
+                "transaction_id": transaction_id,
+                "action": "aborted_by_coordinator_decision",
+            }
+            for transaction_id in aborted
+        )
         return recovered
 
-recovery_manager = RecoveryManager()
\ No newline at end of file
+    async def _fetch_decisions(self, transaction_ids: list) -> dict:
+        """
+        Ask the coordinator for the outcome of each transaction.
+
+        Returns:
+            dict[transaction_id -> "commit" | "abort"], undecided ones omitted
+        """
+        coordinator_url = settings.get_coordinator_url()
+
+        async def fetch(client: httpx.AsyncClient, transaction_id: str):
+            try:
+                response = await client.get(
+                    f"{coordinator_url}/api/transactions/{transaction_id}"
+                )
+            except httpx.HTTPError:
+                return None
+            if response.status_code == 404:
+                # The coordinator logs every transaction before PREPARE, so
+                # an unknown one was never going to commit (presumed abort)
+                return "abort"
+            if response.status_code != 200:
+                return None
+            status = response.json().get("status")
+            if status in _COMMIT_STATES:
+                return "commit"
+            if status in _ABORT_STATES:
+                return "abort"
+            return None
+
+        async with httpx.AsyncClient(timeout=settings.commit_timeout / 1000) as client:
+            results = await asyncio.gather(
+                *(fetch(client, transaction_id) for transaction_id in transaction_ids)
+            )
+
+        return {
+            transaction_id: decision
+            for transaction_id, decision in zip(transaction_ids, results)
+            if decision is not None
+        }
+
+recovery_manager = RecoveryManager()
@@ -1,3 +1,4 @@
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
@@ -7,24 +8,33 @@ from app.config import settings
 class TransactionManager:
     """Helper for write-ahead logging."""
 
-    async def log_prepare(
+    async def log_prepares(
         self,
         db: AsyncSession,
         transaction_id: str,
-        before_state: dict,
-        after_state: dict,
-        details: str = None
+        entries: list[dict],
     ):
-        log = TransactionLog(
-            transaction_id=transaction_id,
-            node_id=settings.node_id,
-            log_type="prepare",
-            old_state=before_state,
-            new_state=after_state,
-            details=details or "Prepared tentative update",
-            applied=False
+        """
+        Write several prepare records with a single multi-row INSERT.
+        Each entry has before_state, after_state and details.
+        """
+        if not entries:
+            return
+
+        await db.execute(
+            insert(TransactionLog).values([
+                {
+                    "transaction_id": transaction_id,
+                    "node_id": settings.node_id,
+                    "log_type": "prepare",
+                    "old_state": entry["before_state"],
+                    "new_state": entry["after_state"],
+                    "details": entry.get("details") or "Prepared tentative update",
+                    "applied": False,
+                }
+                for entry in entries
+            ])
         )
-        db.add(log)
 
     async def log_commit(self, db: AsyncSession, transaction_id: str):
         log = TransactionLog(
@@ -46,4 +56,28 @@ class TransactionManager:
         )
         db.add(log)
 
+    async def log_aborts(
+        self,
+        db: AsyncSession,
+        transaction_ids: list[str],
+        log_type: str = "abort",
+        details: str = "Transaction aborted - rollback applied",
+    ):
+        """Write one abort record per transaction with a single INSERT."""
+        if not transaction_ids:
+            return
+
+        await db.execute(
+            insert(TransactionLog).values([
+                {
+                    "transaction_id": transaction_id,
+                    "node_id": settings.node_id,
+                    "log_type": log_type,
+                    "details": details,
+                    "applied": True,
+                }
+                for transaction_id in transaction_ids
+            ])
+        )
+
 transaction_manager = TransactionManager()
\ No newline at end of file
@@ -1,6 +1,10 @@
-import json
+import os
+import orjson
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# Parsed nodes.json per path, reused while the file's mtime is unchanged
+_config_cache: Dict[Path, Tuple[int, Dict[str, Dict]]] = {}
 
 class NodeRegistry:
     """
@@ -10,39 +14,75 @@ class NodeRegistry:
 
     def __init__(self):
         self.nodes: Dict[str, Dict] = {}
+        self._node_urls: Dict[str, str] = {}
+        self._participant_urls: Dict[str, str] = {}
+        self._participants: List[str] = []
+        self._coordinator: Optional[str] = None
+        self._roles: Dict[str, str] = {}
         self._load()
 
     def _load(self):
-        config_path = Path(__file__).parent.parent.parent / "nodes.json"
-        if config_path.exists():
-            with open(config_path, 'r') as f:
-                self.nodes = json.load(f)
-        else:
+        # NODES_FILE points elsewhere, e.g. at a fixture in the tests
+        config_path = Path(
+            os.environ.get("NODES_FILE")
+            or Path(__file__).parent.parent.parent / "nodes.json"
+        )
+        if not config_path.exists():
             raise FileNotFoundError(f"nodes.json not found at {config_path}")
 
+        mtime = config_path.stat().st_mtime_ns
+        cached = _config_cache.get(config_path)
+        if cached and cached[0] == mtime:
+            self.nodes = cached[1]
+        else:
+            self.nodes = orjson.loads(config_path.read_bytes())
+            _config_cache[config_path] = (mtime, self.nodes)
+
+        # Lookup tables for the request path
+        self._node_urls = {
+            node_id: info["url"]
+            for node_id, info in self.nodes.items()
+            if info.get("url")
+        }
+        self._participant_urls = {
+            node_id: url
+            for node_id, url in self._node_urls.items()
+            if self.nodes[node_id].get("role") == "participant"
+        }
+        self._participants = list(self._participant_urls.values())
+        self._coordinator = next(
+            (
+                info["url"]
+                for info in self.nodes.values()
+                if info.get("role") == "coordinator"
+            ),
+            None,
+        )
+        self._roles = {
+            node_id: info.get("role")
+            for node_id, info in self.nodes.items()
+        }
+
     def get_all_nodes(self) -> Dict[str, Dict]:
         return self.nodes
 
     def get_participant_urls(self) -> List[str]:
-        return [
-            info["url"]
-            for node_id, info in self.nodes.items()
-            if info.get("role") == "participant"
-        ]
+        return self._participants
 
     def get_coordinator_url(self) -> Optional[str]:
-        for info in self.nodes.values():
-            if info.get("role") == "coordinator":
-                return info["url"]
-        return None
+        return self._coordinator
 
     def get_node_url(self, node_id: str) -> Optional[str]:
-        return self.nodes.get(node_id, {}).get("url")
+        return self._node_urls.get(node_id)
+
+    def get_participant_url(self, node_id: str) -> Optional[str]:
+        """URL of node_id if it is a participant, else None."""
+        return self._participant_urls.get(node_id)
 
     def is_participant(self, node_id: str) -> bool:
-        return self.nodes.get(node_id, {}).get("role") == "participant"
+        return self._roles.get(node_id) == "participant"
 
     def is_coordinator(self, node_id: str) -> bool:
-        return self.nodes.get(node_id, {}).get("role") == "coordinator"
+        return self._roles.get(node_id) == "coordinator"
 
 node_registry = NodeRegistry()
\ No newline at end of file
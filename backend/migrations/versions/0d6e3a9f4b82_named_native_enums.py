@@ -0,0 +1,37 @@
+"""Name the native status and lock type enums explicitly
+
+Revision ID: 0d6e3a9f4b82
+Revises: f5a03b8e7c21
+Create Date: 2026-10-15 13:24:41.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d6e3a9f4b82'
+down_revision: Union[str, Sequence[str], None] = 'f5a03b8e7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLAlchemy already created native ENUMs named after the Python classes;
+# rename them so the model's explicit names match. Columns keep their data.
+RENAMES = (
+    ("transactionstatus", "transaction_status_enum"),
+    ("locktype", "lock_type_enum"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for old, new in RENAMES:
+        op.execute(f"ALTER TYPE {old} RENAME TO {new}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for old, new in RENAMES:
+        op.execute(f"ALTER TYPE {new} RENAME TO {old}")
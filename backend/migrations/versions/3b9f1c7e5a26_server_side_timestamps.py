@@ -0,0 +1,49 @@
+"""Generate row timestamps server-side
+
+Revision ID: 3b9f1c7e5a26
+Revises: 0d6e3a9f4b82
+Create Date: 2026-10-15 13:52:08.664210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9f1c7e5a26'
+down_revision: Union[str, Sequence[str], None] = '0d6e3a9f4b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("accounts", "created_at"),
+    ("accounts", "updated_at"),
+    ("distributed_transactions", "created_at"),
+    ("local_transactions", "created_at"),
+    ("transaction_logs", "created_at"),
+    ("locks", "acquired_at"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.DateTime(),
+            server_default=None,
+        )
@@ -0,0 +1,42 @@
+"""Allow one unreleased lock per resource via a partial unique index
+
+Revision ID: 6a4c2e8d1f39
+Revises: 3b9f1c7e5a26
+Create Date: 2026-10-15 14:20:37.901552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a4c2e8d1f39'
+down_revision: Union[str, Sequence[str], None] = '3b9f1c7e5a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The old constraint also covered released rows, so a resource could
+    # never be locked a second time
+    op.drop_constraint("uq_lock_resource", "locks", type_="unique")
+    op.create_index(
+        "uq_lock_active_resource",
+        "locks",
+        ["resource_id", "node_id"],
+        unique=True,
+        postgresql_where=sa.text("released_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_lock_active_resource", table_name="locks")
+    op.create_unique_constraint(
+        "uq_lock_resource",
+        "locks",
+        ["resource_type", "resource_id", "node_id", "lock_type"],
+    )
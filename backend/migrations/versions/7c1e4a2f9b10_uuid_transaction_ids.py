@@ -0,0 +1,40 @@
+"""Store distributed transaction ids as native UUID
+
+Revision ID: 7c1e4a2f9b10
+Revises: 5b3c8b0c8da4
+Create Date: 2026-10-15 09:12:04.511203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4a2f9b10'
+down_revision: Union[str, Sequence[str], None] = '5b3c8b0c8da4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "distributed_transactions",
+        "id",
+        type_=sa.Uuid(),
+        existing_type=sa.String(length=36),
+        postgresql_using="id::uuid",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "distributed_transactions",
+        "id",
+        type_=sa.String(length=36),
+        existing_type=sa.Uuid(),
+        postgresql_using="id::text",
+    )
@@ -0,0 +1,33 @@
+"""Add a partial index on held locks by owning transaction
+
+Revision ID: 9e1d5b3a7c48
+Revises: 6a4c2e8d1f39
+Create Date: 2026-10-15 15:06:12.482019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e1d5b3a7c48'
+down_revision: Union[str, Sequence[str], None] = '6a4c2e8d1f39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_lock_held",
+        "locks",
+        ["transaction_id", "node_id"],
+        postgresql_where=sa.text("released_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_lock_held", table_name="locks")
@@ -0,0 +1,40 @@
+"""Partial indexes for recovery scans
+
+Revision ID: a4d92e6c3f57
+Revises: 7c1e4a2f9b10
+Create Date: 2026-10-15 10:03:41.872551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d92e6c3f57'
+down_revision: Union[str, Sequence[str], None] = '7c1e4a2f9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_transaction_committing",
+        "distributed_transactions",
+        ["decision_made_at"],
+        postgresql_where=sa.text("status = 'COMMITTING'"),
+    )
+    op.create_index(
+        "idx_local_transaction_uncertain",
+        "local_transactions",
+        ["node_id", "prepared_at"],
+        postgresql_where=sa.text("status = 'PREPARED'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_local_transaction_uncertain", table_name="local_transactions")
+    op.drop_index("idx_transaction_committing", table_name="distributed_transactions")
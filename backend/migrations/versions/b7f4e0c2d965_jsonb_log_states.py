@@ -0,0 +1,45 @@
+"""Store transaction log states as JSONB
+
+Revision ID: b7f4e0c2d965
+Revises: 9e1d5b3a7c48
+Create Date: 2026-10-15 15:41:53.027716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f4e0c2d965'
+down_revision: Union[str, Sequence[str], None] = '9e1d5b3a7c48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("old_state", "new_state")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COLUMNS:
+        op.alter_column(
+            "transaction_logs",
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in COLUMNS:
+        op.alter_column(
+            "transaction_logs",
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
@@ -0,0 +1,45 @@
+"""Store participant votes and decisions as JSONB
+
+Revision ID: c81f5d0a2e94
+Revises: a4d92e6c3f57
+Create Date: 2026-10-15 11:47:19.204836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5d0a2e94'
+down_revision: Union[str, Sequence[str], None] = 'a4d92e6c3f57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("participant_votes", "participant_decisions")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COLUMNS:
+        op.alter_column(
+            "distributed_transactions",
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in COLUMNS:
+        op.alter_column(
+            "distributed_transactions",
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
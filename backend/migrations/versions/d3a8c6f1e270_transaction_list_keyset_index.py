@@ -0,0 +1,32 @@
+"""Composite (created_at, id) index for transaction list pagination
+
+Revision ID: d3a8c6f1e270
+Revises: b7f4e0c2d965
+Create Date: 2026-10-15 19:42:10.218334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8c6f1e270'
+down_revision: Union[str, Sequence[str], None] = 'b7f4e0c2d965'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_transaction_created_id",
+        "distributed_transactions",
+        ["created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_transaction_created_id", table_name="distributed_transactions")
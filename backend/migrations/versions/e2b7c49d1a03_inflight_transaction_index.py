@@ -0,0 +1,35 @@
+"""Partial index on undecided distributed transactions
+
+Revision ID: e2b7c49d1a03
+Revises: c81f5d0a2e94
+Create Date: 2026-10-15 12:20:55.639017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c49d1a03'
+down_revision: Union[str, Sequence[str], None] = 'c81f5d0a2e94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_tx_inflight",
+        "distributed_transactions",
+        ["timeout_at"],
+        postgresql_where=sa.text(
+            "status IN ('INIT', 'PREPARING', 'PREPARED')"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_tx_inflight", table_name="distributed_transactions")
@@ -0,0 +1,51 @@
+"""Store local transaction state as JSONB kept out of line
+
+Revision ID: f5a03b8e7c21
+Revises: e2b7c49d1a03
+Create Date: 2026-10-15 12:58:02.117384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a03b8e7c21'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c49d1a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("before_state", "after_state")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COLUMNS:
+        op.alter_column(
+            "local_transactions",
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+        op.execute(
+            f"ALTER TABLE local_transactions ALTER COLUMN {column} SET STORAGE EXTERNAL"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in COLUMNS:
+        op.execute(
+            f"ALTER TABLE local_transactions ALTER COLUMN {column} SET STORAGE EXTENDED"
+        )
+        op.alter_column(
+            "local_transactions",
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
@@ -0,0 +1,176 @@
+import pytest
+
+from app.api import participant
+from app.config import settings
+from app.schemas import HeartbeatRequest
+from app.services import coordinator_service as coordinator_module
+from app.services.coordinator_service import CoordinatorService
+
+NODE1 = "http://node1:8001"
+NODE2 = "http://node2:8002"
+
+
+class FakeSession:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, *args):
+        self.executed.append(stmt)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(coordinator_module, "AsyncSessionLocal", lambda: session)
+    return session
+
+
+def _transfer(from_node, from_account, to_node, to_account):
+    row = {
+        "id": f"{from_account}->{to_account}",
+        "operation_data": {
+            "from_node": from_node,
+            "from_account": from_account,
+            "to_node": to_node,
+            "to_account": to_account,
+            "amount": 1,
+        },
+    }
+    return (row, None, None)
+
+
+def test_split_conflicts_defers_overlapping_accounts():
+    service = CoordinatorService()
+    a = _transfer("node1", "A", "node2", "B")
+    b = _transfer("node1", "C", "node2", "B")
+    c = _transfer("node1", "C", "node1", "D")
+    d = _transfer("node2", "A", "node1", "E")
+
+    ready, deferred = service._split_conflicts([a, b, c, d])
+
+    # b shares node2/B with a; c, and d's node2/A, are free
+    assert ready == [a, c, d]
+    assert deferred == [b]
+
+
+def test_heartbeat_payload_lists_pending_commits():
+    service = CoordinatorService()
+    assert service.heartbeat_payload(NODE1)["committed"] == []
+
+    service._record_commits(NODE1, ["t1", "t2"])
+    payload = service.heartbeat_payload(NODE1)
+    assert payload["committed"] == ["t1", "t2"]
+    assert payload["last_committed"] == "t2"
+    assert payload["last_committed_index"] == 2
+
+
+@pytest.mark.asyncio
+async def test_ack_commits_completes_only_when_every_participant_acked(session):
+    service = CoordinatorService()
+    service._record_commits(NODE1, ["t1", "t2"])
+    service._record_commits(NODE2, ["t1"])
+
+    # Unknown ids and ids not applied are ignored
+    await service.ack_commits(NODE1, ["t1", "other"])
+    assert service.heartbeat_payload(NODE1)["committed"] == ["t2"]
+    assert session.commits == 0
+
+    await service.ack_commits(NODE2, ["t1"])
+    assert service.heartbeat_payload(NODE2)["committed"] == []
+    assert session.commits == 1
+    assert "t1" not in service._awaiting_ack
+    assert "t2" in service._awaiting_ack
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_acks_only_applied_commits(monkeypatch):
+    monkeypatch.setattr(settings, "node_role", "participant")
+
+    async def commit_transaction(db, transaction_id):
+        if transaction_id == "broken":
+            raise RuntimeError("commit failed")
+        # "aborted" was aborted locally and must not be acknowledged
+        return transaction_id != "aborted"
+
+    monkeypatch.setattr(
+        participant.participant_service, "commit_transaction", commit_transaction
+    )
+    db = FakeSession()
+
+    response = await participant.heartbeat(
+        HeartbeatRequest(committed=["t1", "broken", "aborted", "t2"]),
+        db=db,
+    )
+
+    assert response["applied"] == ["t1", "t2"]
+    assert db.rollbacks == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_ack_update_keeps_commits_pending(session, monkeypatch):
+    service = CoordinatorService()
+    service._record_commits(NODE1, ["t1"])
+
+    async def failing_execute(stmt, *args):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(session, "execute", failing_execute)
+    with pytest.raises(RuntimeError):
+        await service.ack_commits(NODE1, ["t1"])
+
+    assert service.heartbeat_payload(NODE1)["committed"] == ["t1"]
+    assert service._awaiting_ack["t1"] == {NODE1}
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+@pytest.mark.asyncio
+async def test_abort_expired_skips_inflight_and_notifies_participants(session, monkeypatch):
+    service = CoordinatorService()
+    service._inflight.add("running")
+
+    async def execute(stmt, *args):
+        session.executed.append(stmt)
+        return FakeResult([("stale", [NODE1, NODE2])])
+
+    posted = []
+
+    async def post(url, payload, timeout):
+        posted.append((url, payload))
+
+    monkeypatch.setattr(session, "execute", execute)
+    monkeypatch.setattr(service, "_post", post)
+
+    assert await service.abort_expired() == ["stale"]
+    assert session.commits == 1
+
+    sql = str(session.executed[0])
+    assert "timeout_at <" in sql
+    assert "NOT IN" in sql
+    assert sorted(url for url, _ in posted) == [
+        f"{NODE1}/api/decision_batch",
+        f"{NODE2}/api/decision_batch",
+    ]
+    assert posted[0][1] == {
+        "decisions": [{"transaction_id": "stale", "decision": "abort"}]
+    }
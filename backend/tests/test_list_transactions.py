@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.coordinator import router
+from app.database import engine, get_db
+from app.models import TransactionStatus
+from app.utils.ids import uuid7
+
+
+class FakeSession:
+    """Serves pages from canned rows and records the SQL it was given."""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=engine.dialect)))
+        return iter(self.pages.pop(0))
+
+
+def _rows(count, start):
+    return [
+        (
+            str(uuid7()),
+            TransactionStatus.COMMITTED,
+            "transfer",
+            start - timedelta(seconds=i),
+            None,
+            2,
+        )
+        for i in range(count)
+    ]
+
+
+def _client(session):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: session
+    return TestClient(app)
+
+
+def test_second_page_follows_cursor():
+    now = datetime(2026, 10, 15, 12, 0, 0)
+    first, second = _rows(2, now), _rows(1, now - timedelta(minutes=1))
+    session = FakeSession([first, second])
+    client = _client(session)
+
+    page = client.get("/api/transactions", params={"limit": 2}).json()
+    assert [t["transaction_id"] for t in page["transactions"]] == [r[0] for r in first]
+    assert page["next_cursor"] == first[-1][0]
+    assert "WHERE" not in session.statements[0]
+
+    page = client.get(
+        "/api/transactions",
+        params={"limit": 2, "before": page["next_cursor"]},
+    ).json()
+    assert [t["transaction_id"] for t in page["transactions"]] == [second[0][0]]
+    assert page["next_cursor"] is None
+
+    # The cursor is compared as a uuid on (created_at, id)
+    sql = session.statements[1]
+    assert "(distributed_transactions.created_at, distributed_transactions.id) <" in sql
+    assert "::UUID" in sql
+    assert "VARCHAR" not in sql
+
+
+def test_limit_must_be_positive():
+    client = _client(FakeSession([]))
+    assert client.get("/api/transactions", params={"limit": 0}).status_code == 422